@@ -39,7 +39,9 @@ with DAG(
         """Transform and clean the raw data."""
         import pandas as pd
         from transform import transform
-        df_raw = pd.read_csv('/tmp/movies_raw.csv')
+        # Read back into Arrow-backed columns, matching what extract_from_s3()
+        # returns, so transform() produces the same types on both paths
+        df_raw = pd.read_csv('/tmp/movies_raw.csv', dtype_backend='pyarrow')
         df_movies, df_genres = transform(df_raw)
         # Save transformed data to temp files
         df_movies.to_csv('/tmp/movies_clean.csv', index=False)
@@ -51,8 +53,9 @@ with DAG(
         """Load transformed data into PostgreSQL staging tables."""
         import pandas as pd
         from load_postgres import load_to_postgres
-        df_movies = pd.read_csv('/tmp/movies_clean.csv')
-        df_genres = pd.read_csv('/tmp/genres_clean.csv')
+        # Nullable Arrow ints keep budget/box_office integral despite NULLs
+        df_movies = pd.read_csv('/tmp/movies_clean.csv', dtype_backend='pyarrow')
+        df_genres = pd.read_csv('/tmp/genres_clean.csv', dtype_backend='pyarrow')
         load_to_postgres(df_movies, df_genres)
         print("Data loaded into PostgreSQL successfully.")
 
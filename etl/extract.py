@@ -1,34 +1,210 @@
 import boto3
 import pandas as pd
-from io import StringIO
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
+from io import BytesIO
+from typing import Iterator
 from dotenv import load_dotenv
 import os
 
 load_dotenv()
 
-def extract_from_s3() -> pd.DataFrame:
+MB = 1024 * 1024
+
+# Multipart settings for the S3 download: objects above the threshold are
+# fetched as parallel byte-range GETs instead of a single connection
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8 * MB,
+    multipart_chunksize=16 * MB,
+    max_concurrency=16,
+    use_threads=True
+)
+
+CSV_KEY = 'movies.csv'
+
+# Multithreaded PyArrow CSV parsing in 8 MB blocks. The null handling matches
+# pd.read_csv: empty text cells and markers like "NA"/"None" become nulls
+CSV_READ_OPTIONS = pacsv.ReadOptions(use_threads=True, block_size=8 * MB)
+CSV_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    null_values=pacsv.ConvertOptions().null_values + ['None', '<NA>'],
+    strings_can_be_null=True
+)
+
+# Columns of movies.csv
+CSV_COLUMNS = ['title', 'release_year', 'genre', 'director', 'language',
+               'country', 'duration', 'budget', 'box_office']
+
+# The streaming reader fixes column types from the first block, so every
+# column is read as text and numeric ones are left for transform() to parse.
+# Otherwise a later block could fail to convert, e.g. "unknown" in box_office,
+# or any value in a column that was empty throughout the first block
+CSV_STREAM_CONVERT_OPTIONS = pacsv.ConvertOptions(
+    null_values=CSV_CONVERT_OPTIONS.null_values,
+    strings_can_be_null=True,
+    column_types={column: pa.string() for column in CSV_COLUMNS}
+)
+
+# Parquet copy of the parsed CSV, written on the first run so later runs
+# can skip CSV parsing and get the column types back as-is
+PARQUET_KEY = 'movies.parquet'
+
+# S3 user metadata key on the Parquet object holding the ETag of the CSV
+# it was parsed from; the cache is only used while that ETag still matches
+SOURCE_ETAG_METADATA = 'source-csv-etag'
+
+
+def get_s3_client():
     """
-    Read "movies.csv" from AWS S3 and return pandas DataFrame.
+    Creates and returns a boto3 S3 client using credentials from .env file.
     """
-    s3_client = boto3.client(
+    return boto3.client(
         's3',
         aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
         aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
         region_name=os.getenv('AWS_REGION')
     )
 
-    response = s3_client.get_object(
-        Bucket=os.getenv('AWS_BUCKET_NAME'),
-        Key='movies.csv'
+
+def get_csv_etag(s3_client, bucket: str) -> str:
+    """
+    Returns the ETag of movies.csv, which changes whenever the file does.
+    """
+    return s3_client.head_object(Bucket=bucket, Key=CSV_KEY)['ETag']
+
+
+def parquet_cache_is_fresh(s3_client, bucket: str, csv_etag: str) -> bool:
+    """
+    Returns True if movies.parquet exists and was written from the CSV
+    with the given ETag, i.e. it can be used instead of the current CSV.
+    """
+    try:
+        parquet_head = s3_client.head_object(Bucket=bucket, Key=PARQUET_KEY)
+    except ClientError:
+        return False
+
+    return parquet_head['Metadata'].get(SOURCE_ETAG_METADATA) == csv_etag
+
+
+def write_parquet_cache(s3_client, bucket: str, df: pd.DataFrame,
+                        csv_etag: str) -> None:
+    """
+    Uploads the parsed DataFrame to S3 as Snappy-compressed Parquet,
+    tagged with the ETag of the CSV it was parsed from.
+    A failed upload only means the next run parses the CSV again,
+    so it is reported but not raised.
+    """
+    buffer = BytesIO()
+    df.to_parquet(buffer, engine='pyarrow', compression='snappy', index=False)
+    buffer.seek(0)
+
+    try:
+        s3_client.upload_fileobj(
+            Fileobj=buffer,
+            Bucket=bucket,
+            Key=PARQUET_KEY,
+            ExtraArgs={'Metadata': {SOURCE_ETAG_METADATA: csv_etag}},
+            Config=TRANSFER_CONFIG
+        )
+        print(f"Cached parsed data as {PARQUET_KEY} in S3.")
+    except (ClientError, BotoCoreError) as e:
+        print(f"Could not write {PARQUET_KEY} to S3: {e}")
+
+
+def extract_from_s3() -> pd.DataFrame:
+    """
+    Read "movies.csv" from AWS S3 and return pandas DataFrame.
+
+    On the first run the parsed frame is also saved to S3 as movies.parquet;
+    later runs read that instead, as long as movies.csv hasn't been
+    replaced since.
+
+    The returned frame is meant to be handed straight to transform(),
+    which modifies it in place.
+    """
+    s3_client = get_s3_client()
+    bucket = os.getenv('AWS_BUCKET_NAME')
+
+    # Prefer the Parquet copy from a previous run if the CSV hasn't changed
+    csv_etag = get_csv_etag(s3_client, bucket)
+    use_parquet = parquet_cache_is_fresh(s3_client, bucket, csv_etag)
+
+    # download_fileobj goes through the S3 TransferManager, which splits
+    # large objects into ranged GETs and downloads them concurrently.
+    # pandas then reads the bytes directly, without a decoded str copy.
+    buffer = BytesIO()
+    s3_client.download_fileobj(
+        Bucket=bucket,
+        Key=PARQUET_KEY if use_parquet else CSV_KEY,
+        Fileobj=buffer,
+        Config=TRANSFER_CONFIG
     )
+    buffer.seek(0)
+
+    if use_parquet:
+        df = pd.read_parquet(buffer, engine='pyarrow', dtype_backend='pyarrow')
+    else:
+        # PyArrow's CSV reader parses blocks in parallel across cores, and
+        # ArrowDtype columns let transform() run on Arrow kernels
+        table = pacsv.read_csv(
+            buffer,
+            read_options=CSV_READ_OPTIONS,
+            convert_options=CSV_CONVERT_OPTIONS
+        )
+        df = table.to_pandas(types_mapper=pd.ArrowDtype)
 
-    csv_content = response['Body'].read().decode('utf-8')
-    df = pd.read_csv(StringIO(csv_content))
+        # download_fileobj doesn't report which version it fetched, so only
+        # cache if the CSV's ETag was the same before and after the download;
+        # otherwise the frame may not match the ETag we'd tag it with
+        if get_csv_etag(s3_client, bucket) == csv_etag:
+            write_parquet_cache(s3_client, bucket, df, csv_etag)
+        else:
+            print(f"{CSV_KEY} changed during download; not caching it as Parquet.")
 
     print(f"Extrected {len(df)} rows from S3.")
     return df
 
 
+def extract_chunks_from_s3() -> Iterator[pd.DataFrame]:
+    """
+    Stream movies data from AWS S3 as an iterator of DataFrame chunks.
+
+    Yields the same Arrow-backed columns as extract_from_s3(), but one block
+    at a time, so transform and load can start before the download finishes
+    (see load_postgres.stream_to_postgres). A fresh movies.parquet is read
+    batch by batch; otherwise the CSV StreamingBody is parsed incrementally
+    by PyArrow's streaming CSV reader.
+    """
+    s3_client = get_s3_client()
+    bucket = os.getenv('AWS_BUCKET_NAME')
+
+    if parquet_cache_is_fresh(s3_client, bucket, get_csv_etag(s3_client, bucket)):
+        # Parquet needs a seekable file, so it is downloaded first
+        buffer = BytesIO()
+        s3_client.download_fileobj(
+            Bucket=bucket,
+            Key=PARQUET_KEY,
+            Fileobj=buffer,
+            Config=TRANSFER_CONFIG
+        )
+        buffer.seek(0)
+        for batch in pq.ParquetFile(buffer).iter_batches():
+            yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+        return
+
+    response = s3_client.get_object(Bucket=bucket, Key=CSV_KEY)
+
+    reader = pacsv.open_csv(
+        response['Body'],
+        read_options=CSV_READ_OPTIONS,
+        convert_options=CSV_STREAM_CONVERT_OPTIONS
+    )
+    for batch in reader:
+        yield batch.to_pandas(types_mapper=pd.ArrowDtype)
+
+
 if __name__ == "__main__":
     df = extract_from_s3()
     print(df.head())
@@ -1,20 +1,43 @@
 from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import Callable, Iterable, Iterator, Tuple
 import pandas as pd
 import os
 
 load_dotenv()
 
 
+@lru_cache(maxsize=None)
 def get_engine():
     """
     Creates and returns a SQLAlchemy engine using credentials from .env file.
     The engine is the core connection object — it manages the connection pool
     to PostgreSQL and is reused across all database operations.
+
+    The engine is cached, so every caller in the process shares one
+    QueuePool instead of opening fresh connections. pool_pre_ping checks a
+    connection before handing it out, and pool_recycle replaces connections
+    older than an hour so the server never sees stale sessions.
+
+    executemany_mode='values_plus_batch' makes psycopg2 collapse multi-row
+    INSERT/UPDATE statements into batched VALUES lists instead of sending
+    one statement per row.
     """
     return create_engine(
         f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
-        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
+        f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}",
+        executemany_mode='values_plus_batch',
+        insertmanyvalues_page_size=1000,
+        executemany_batch_page_size=500,
+        poolclass=QueuePool,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=3600
     )
 
 
@@ -42,9 +65,31 @@ def create_tables(engine) -> None:
             );
         """))
 
+        # Serves "top movies by ROI" queries as an index walk instead of a sort
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_movies_roi
+                ON movies (roi DESC NULLS LAST);
+        """))
+
         conn.execute(text("""
             CREATE TABLE IF NOT EXISTS movie_genres (
                 id       SERIAL PRIMARY KEY,
+                title    VARCHAR(300) NOT NULL,
+                genre    VARCHAR(100) NOT NULL,
+                CONSTRAINT movie_genres_title_genre_key UNIQUE (title, genre)
+            );
+        """))
+
+        # Used by per-genre aggregations (GROUP BY genre)
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_genres_genre
+                ON movie_genres (genre);
+        """))
+
+        # Unlogged landing table for genre rows; duplicates are removed
+        # in SQL when they are moved into movie_genres
+        conn.execute(text("""
+            CREATE UNLOGGED TABLE IF NOT EXISTS movie_genres_staging (
                 title    VARCHAR(300) NOT NULL,
                 genre    VARCHAR(100) NOT NULL
             );
@@ -53,81 +98,245 @@ def create_tables(engine) -> None:
         print("Tables created successfully (or already exist).")
 
 
+def copy_dataframe(cursor, df: pd.DataFrame, table: str) -> None:
+    """
+    Bulk-loads a DataFrame into an existing table with PostgreSQL COPY.
+
+    The DataFrame is written to an in-memory CSV and streamed through
+    COPY FROM STDIN in a single command, which avoids the per-row INSERT
+    parsing and round-trips that to_sql would issue.
+
+    Runs on the given psycopg2 cursor and does not commit, so several
+    COPYs can share one transaction.
+
+    Integer columns must use a nullable integer dtype (as transform()
+    returns), since COPY will not accept "1000.0" for an INTEGER/BIGINT column.
+    """
+    buffer = StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep='')
+    buffer.seek(0)
+
+    columns = ', '.join(df.columns)
+    cursor.copy_expert(
+        f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT CSV, NULL '')",
+        buffer
+    )
+
+
+def drop_secondary_indexes(cursor, table: str) -> list:
+    """
+    Drops every index on `table` that is not backing a constraint
+    (PRIMARY KEY / UNIQUE) and returns their CREATE INDEX statements.
+
+    Maintaining indexes row by row during a bulk load is slower than
+    building them once afterwards, so the loaders drop them before COPY
+    and pass the returned list to recreate_indexes() when done.
+    """
+    cursor.execute("""
+        SELECT i.indexname, i.indexdef
+        FROM pg_indexes i
+        WHERE i.schemaname = current_schema()
+          AND i.tablename = %s
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_constraint c
+              WHERE c.conindid =
+                  (quote_ident(i.schemaname) || '.' || quote_ident(i.indexname))::regclass
+          )
+    """, (table,))
+    indexes = cursor.fetchall()
+
+    for index_name, _ in indexes:
+        cursor.execute(f'DROP INDEX IF EXISTS "{index_name}"')
+
+    return [index_def for _, index_def in indexes]
+
+
+def recreate_indexes(cursor, index_defs: list) -> None:
+    """
+    Re-runs the CREATE INDEX statements returned by drop_secondary_indexes().
+    """
+    for index_def in index_defs:
+        cursor.execute(index_def)
+
+
+def add_genres_unique_constraint(cursor) -> None:
+    """
+    Adds the UNIQUE (title, genre) constraint to movie_genres tables that
+    were created before it existed.
+
+    Such tables may hold duplicate pairs, so bulk_load calls this right
+    after its TRUNCATE of movie_genres, in the same transaction; if the
+    load then fails, the old rows come back along with the old schema.
+    """
+    cursor.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (
+                SELECT 1 FROM pg_constraint
+                WHERE conrelid = 'movie_genres'::regclass
+                  AND conname = 'movie_genres_title_genre_key'
+            ) THEN
+                ALTER TABLE movie_genres
+                    ADD CONSTRAINT movie_genres_title_genre_key
+                    UNIQUE (title, genre);
+            END IF;
+        END $$;
+    """)
+
+
+def merge_genres_from_staging(cursor) -> int:
+    """
+    Moves rows from movie_genres_staging into movie_genres, letting
+    PostgreSQL drop duplicate (title, genre) pairs, then empties the
+    staging table. Returns the number of rows inserted.
+    """
+    cursor.execute("""
+        INSERT INTO movie_genres (title, genre)
+        SELECT DISTINCT title, genre FROM movie_genres_staging
+        ON CONFLICT DO NOTHING
+    """)
+    inserted = cursor.rowcount
+    cursor.execute("TRUNCATE TABLE movie_genres_staging")
+    return inserted
+
+
+def bulk_load(engine, batches: Iterable[Tuple[pd.DataFrame, pd.DataFrame]]) -> Tuple[int, int]:
+    """
+    Full-refresh load of (df_movies, df_movie_genres) batches into PostgreSQL.
+
+    Shared by load_to_postgres (a single batch) and stream_to_postgres
+    (one batch per chunk). Everything runs in one transaction:
+      - movies, movie_genres and the staging table are TRUNCATEd
+      - secondary indexes are dropped, and rebuilt once all rows are in
+      - each batch is COPYed; genre rows land in movie_genres_staging and
+        are deduplicated into movie_genres at the end
+    A failure part-way leaves the previous data untouched.
+
+    Returns the number of movies and unique movie-genre rows loaded.
+    """
+    movies_total = 0
+
+    conn = engine.raw_connection()
+    try:
+        with conn.cursor() as cur:
+            # The load is a full refresh we can always re-run, so don't
+            # wait for the WAL flush on commit
+            cur.execute("SET LOCAL synchronous_commit = OFF")
+
+            cur.execute("TRUNCATE TABLE movies CASCADE")
+            cur.execute("TRUNCATE TABLE movie_genres CASCADE")
+            add_genres_unique_constraint(cur)
+            cur.execute("TRUNCATE TABLE movie_genres_staging")
+            movies_indexes = drop_secondary_indexes(cur, 'movies')
+            genres_indexes = drop_secondary_indexes(cur, 'movie_genres')
+
+            for df_movies, df_movie_genres in batches:
+                copy_dataframe(cur, df_movies, 'movies')
+                copy_dataframe(cur, df_movie_genres, 'movie_genres_staging')
+                movies_total += len(df_movies)
+
+            genres_total = merge_genres_from_staging(cur)
+            recreate_indexes(cur, movies_indexes)
+            recreate_indexes(cur, genres_indexes)
+        conn.commit()
+    finally:
+        conn.close()
+
+    return movies_total, genres_total
+
+
+def verify_row_counts(engine) -> None:
+    """
+    Prints the row counts of both tables (fetched in one round-trip).
+    """
+    with engine.begin() as conn:  # ← connect() → begin()
+        movies_count, genres_count = conn.execute(text("""
+            SELECT (SELECT COUNT(*) FROM movies),
+                   (SELECT COUNT(*) FROM movie_genres)
+        """)).one()
+
+    print(f"\nVerification:")
+    print(f"  movies table:       {movies_count} rows")
+    print(f"  movie_genres table: {genres_count} rows")
+
+
 def load_to_postgres(df_movies: pd.DataFrame,
                      df_movie_genres: pd.DataFrame) -> None:
     """
     Loads cleaned DataFrames into PostgreSQL staging tables.
 
-    if_exists='replace' means:
-      - If the table already has data, drop it and reload from scratch
-      - This is appropriate for a full-refresh pipeline like ours
-      - Alternative would be 'append' for incremental loads
-
-    index=False means:
-      - Don't write the pandas DataFrame index (0, 1, 2...) as a column
-      - We have our own SERIAL PRIMARY KEY defined in the schema
+    This is a full-refresh load:
+      - Each table is TRUNCATEd, then reloaded from scratch
+      - Rows are streamed in with COPY FROM STDIN (see copy_dataframe),
+        which is much faster than row-by-row INSERTs
+      - The pandas index is not written; we have our own SERIAL PRIMARY KEY
     """
     engine = get_engine()
 
     # Step 1: Create tables with proper schema
     create_tables(engine)
 
-    # Step 2: Load movies table
-    print(f"Loading {len(df_movies)} rows into movies table...")
-    with engine.begin() as conn:
-        conn.execute(text("TRUNCATE TABLE movies CASCADE"))
-    df_movies.to_sql(
-        name='movies',
-        con=engine,
-        if_exists='append',   # ← replace → append
-        index=False
-    )
-    print("movies table loaded successfully.")
+    # Step 2: Load both tables
+    print(f"Loading {len(df_movies)} movies and {len(df_movie_genres)} genre rows...")
+    movies_total, genres_total = bulk_load(engine, [(df_movies, df_movie_genres)])
+    print(f"Loaded {movies_total} movies, {genres_total} unique genre rows.")
 
-    # Step 3: Load movie_genres table
-    print(f"Loading {len(df_movie_genres)} rows into movie_genres table...")
-    with engine.begin() as conn:
-        conn.execute(text("TRUNCATE TABLE movie_genres CASCADE"))
-    df_movie_genres.to_sql(
-        name='movie_genres',
-        con=engine,
-        if_exists='append',   # ← replace → append
-        index=False
-    )
-    print("movie_genres table loaded successfully.")
+    # Step 3: Verify row counts match what we loaded
+    verify_row_counts(engine)
 
-    # Step 4: Verify row counts match what we loaded
-    with engine.begin() as conn:  # ← connect() → begin()
-        movies_count = conn.execute(
-            text("SELECT COUNT(*) FROM movies")
-        ).scalar()
 
-        genres_count = conn.execute(
-            text("SELECT COUNT(*) FROM movie_genres")
-        ).scalar()
+def prefetch(items: Iterable) -> Iterator:
+    """
+    Yields from `items` while a background thread already fetches the
+    next item, so producing it (e.g. downloading a chunk) overlaps with
+    whatever the caller does with the current one.
+    """
+    items = iter(items)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(next, items, None)
+        while True:
+            item = pending.result()
+            if item is None:
+                return
+            pending = executor.submit(next, items, None)
+            yield item
 
-    print(f"\nVerification:")
-    print(f"  movies table:       {movies_count} rows")
-    print(f"  movie_genres table: {genres_count} rows")
 
+def stream_to_postgres(raw_chunks: Iterable[pd.DataFrame],
+                       transform_fn: Callable) -> None:
+    """
+    Transforms and loads raw chunks into PostgreSQL as they arrive.
 
-if __name__ == "__main__":
-    # Full pipeline test: extract from local CSV → transform → load to PostgreSQL
-    from extract import extract_from_s3
-    from transform import transform
+    Instead of running extract, transform and load one after another,
+    the next raw chunk is downloaded in a background thread while the
+    current one is transformed and COPYed. Wall-clock time becomes roughly
+    the slowest of the three stages rather than their sum.
+
+    raw_chunks is any iterator of raw DataFrames, e.g. extract_chunks_from_s3().
+    transform_fn is transform() from transform.py; every movie's genres are
+    in the same row, so it can be applied to each chunk independently.
+    It is called with verbose=False so the summary isn't printed per chunk.
+    """
+    engine = get_engine()
+    create_tables(engine)
+
+    batches = (
+        transform_fn(df_raw, verbose=False) for df_raw in prefetch(raw_chunks)
+    )
+    movies_total, genres_total = bulk_load(engine, batches)
+    print(f"Streaming load complete: {movies_total} movies, {genres_total} unique genre rows.")
+
+    verify_row_counts(engine)
 
-    print("=== Starting ETL: Extract → Transform → Load ===\n")
 
-    # Extract
-    print("--- EXTRACT ---")
-    df_raw = extract_from_s3()
+if __name__ == "__main__":
+    # Full pipeline run: stream from S3 → transform → load to PostgreSQL,
+    # with the three stages overlapping chunk by chunk
+    from extract import extract_chunks_from_s3
+    from transform import transform
 
-    # Transform
-    print("\n--- TRANSFORM ---")
-    df_movies, df_movie_genres = transform(df_raw)
+    print("=== Starting ETL: Extract → Transform → Load (streaming) ===\n")
 
-    # Load
-    print("\n--- LOAD ---")
-    load_to_postgres(df_movies, df_movie_genres)
+    stream_to_postgres(extract_chunks_from_s3(), transform)
 
-    print("\n=== ETL Complete ===")
\ No newline at end of file
+    print("\n=== ETL Complete ===")
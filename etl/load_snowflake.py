@@ -105,6 +105,9 @@ def load_to_snowflake(df_movies: pd.DataFrame,
     print("Snowflake movies table loaded successfully.")
 
     # Step 3: Load movie_genres table
+    # transform() leaves duplicate (title, genre) pairs for the PostgreSQL
+    # loader to remove, so they are dropped here instead
+    df_movie_genres = df_movie_genres.drop_duplicates()
     print(f"Loading {len(df_movie_genres)} rows into Snowflake movie_genres table...")
     with engine.begin() as conn:
         conn.execute(text("TRUNCATE TABLE movie_genres"))
@@ -21,73 +21,80 @@ GENRE_CORRECTIONS = {
     'Avant-Garde': 'Documentary'
 }
 
+# Free-text columns that need whitespace cleanup
+TEXT_COLUMNS = ['title', 'director', 'language', 'country']
 
-def fix_genre(genre: str) -> str:
+
+def clean_text(col: pd.Series) -> pd.Series:
     """
-    Corrects a single genre string using the GENRE_CORRECTIONS mapping.
-    Returns the corrected genre, or the original if no correction exists.
+    Strips leading/trailing whitespace and turns empty strings into nulls.
+    The loader's COPY reads empty fields as NULL anyway, so making that
+    explicit here lets transform() drop such values before loading.
     """
-    genre = genre.strip()
-    return GENRE_CORRECTIONS.get(genre, genre)
+    col = col.str.strip()
+    return col.mask((col == '').fillna(False))
 
 
-def clean_genres(genre_string: str) -> list:
-    """
-    Splits a comma-separated genre string into a list of cleaned genre names.
-    Applies typo correction and removes duplicates while preserving order.
-    Example: "Action, Horor, Mistery" → ["Action", "Horror", "Mystery"]
-    """
-    if pd.isna(genre_string):
-        return []
-    genres = [fix_genre(g) for g in genre_string.split(',')]
-    seen = set()
-    unique_genres = []
-    for g in genres:
-        if g not in seen:
-            seen.add(g)
-            unique_genres.append(g)
-    return unique_genres
-
-
-def transform(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def transform(df: pd.DataFrame,
+              verbose: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
     Main transformation function.
 
     Accepts raw DataFrame loaded from S3.
+    The input is cleaned in place rather than copied, to avoid holding two
+    versions of the raw data in memory; pass df.copy() if you still need
+    the original afterwards.
+
     Returns two DataFrames:
       - df_movies: cleaned movies table (one row per movie, no genre column)
       - df_movie_genres: normalized genres table (one row per movie-genre pair)
-    """
-    print("Starting transformation...")
-    print(f"Input rows: {len(df)}")
 
-    # Work on a copy to avoid modifying the original DataFrame in memory
-    df = df.copy()
-
-    # Replace string "unknown" with NaN so it's treated as a true null value
-    df['box_office'] = df['box_office'].replace('unknown', np.nan)
+    verbose=False skips the progress and summary output, e.g. when it is
+    called once per chunk by load_postgres.stream_to_postgres.
+    """
+    if verbose:
+        print("Starting transformation...")
+        print(f"Input rows: {len(df)}")
 
     # Convert numeric columns from string/object type to proper numeric types
     # errors='coerce' turns any unparseable values into NaN instead of raising errors
-    df['budget'] = pd.to_numeric(df['budget'], errors='coerce')
-    df['box_office'] = pd.to_numeric(df['box_office'], errors='coerce')
-    df['duration'] = pd.to_numeric(df['duration'], errors='coerce')
-    df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce')
-
-    # Strip leading/trailing whitespace from all text columns
-    df['title'] = df['title'].str.strip()
-    df['director'] = df['director'].str.strip()
-    df['language'] = df['language'].str.strip()
-    df['country'] = df['country'].str.strip()
+    # (this also covers the string "unknown" used for missing box_office values)
+    # dtype_backend='pyarrow' keeps the results as nullable Arrow columns
+    # downcast='integer' picks the smallest int type that fits (e.g. int16 for
+    # release_year), which all still fit the INTEGER/BIGINT Postgres columns
+    df['budget'] = pd.to_numeric(df['budget'], errors='coerce',
+                                 dtype_backend='pyarrow', downcast='integer')
+    df['box_office'] = pd.to_numeric(df['box_office'], errors='coerce',
+                                     dtype_backend='pyarrow', downcast='integer')
+    df['duration'] = pd.to_numeric(df['duration'], errors='coerce',
+                                   dtype_backend='pyarrow', downcast='integer')
+    df['release_year'] = pd.to_numeric(df['release_year'], errors='coerce',
+                                       dtype_backend='pyarrow', downcast='integer')
+
+    # Strip leading/trailing whitespace from all text columns in one pass
+    # (runs in Arrow's string kernels when the frame is Arrow-backed)
+    df[TEXT_COLUMNS] = df[TEXT_COLUMNS].apply(clean_text)
+
+    # title is NOT NULL in both tables, so movies without one can't be loaded
+    missing_titles = df['title'].isna().sum()
+    df.dropna(subset=['title'], inplace=True)
 
     # Calculate ROI (Return on Investment) as a percentage
     # Formula: (box_office - budget) / budget * 100
     # This derived metric will be used in visualizations and analytics
-    df['roi'] = ((df['box_office'] - df['budget']) / df['budget'] * 100).round(2)
+    # Computed in place on NumPy arrays; movies with a missing or zero budget
+    # get NaN instead of inf
+    box_office = df['box_office'].to_numpy(dtype='float64', na_value=np.nan)
+    budget = df['budget'].to_numpy(dtype='float64', na_value=np.nan)
+    roi = np.full(len(df), np.nan)
+    np.divide(box_office - budget, budget, out=roi, where=budget > 0)
+    np.multiply(roi, 100, out=roi)
+    np.round(roi, 2, out=roi)
+    df['roi'] = roi
 
     # Create the movies table by dropping the genre column
     # Genres are stored separately in a normalized table (df_movie_genres)
-    df_movies = df.drop(columns=['genre']).copy()
+    df_movies = df.drop(columns=['genre'])
 
     # Normalize genres: split "Action, Drama, Sci-Fi" into separate rows
     # Result: one row per movie-genre combination
@@ -95,31 +102,47 @@ def transform(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
     # After:  Avatar | Action
     #         Avatar | Adventure
     #         Avatar | Sci-Fi
-    rows = []
-    for idx, row in df.iterrows():
-        genres = clean_genres(row['genre'])
-        for genre in genres:
-            rows.append({
-                'title': row['title'],
-                'genre': genre
-            })
-
-    df_movie_genres = pd.DataFrame(rows)
+    # Done with vectorized string ops instead of a per-row Python loop:
+    # explode gives one row per genre, then strip and correct typos
+    df_movie_genres = (
+        df[['title', 'genre']]
+        .assign(genre=df['genre'].str.split(','))
+        .explode('genre')
+    )
+
+    # As a categorical, the typo lookup runs once per distinct genre
+    # (a few dozen) rather than once per row. The mapping covers every
+    # category, so pandas can apply it as a plain dict lookup
+    # Empty entries from trailing or doubled commas ("Action, ") become
+    # nulls and are dropped below
+    genres = clean_text(df_movie_genres['genre']).astype('category')
+    fix_genre = GENRE_CORRECTIONS.get
+    genre_map = {g: fix_genre(g, g) for g in genres.cat.categories}
+    df_movie_genres['genre'] = genres.map(genre_map).astype('category')
+    # Duplicate (title, genre) pairs are removed in PostgreSQL on load
+    # (see load_postgres.merge_genres_from_staging)
+    df_movie_genres = (
+        df_movie_genres
+        .dropna(subset=['genre'])
+        .reset_index(drop=True)
+    )
 
     # Print transformation summary for logging/debugging
-    print(f"Movies after cleaning: {len(df_movies)}")
-    print(f"Rows with NULL box_office: {df_movies['box_office'].isna().sum()}")
-    print(f"Rows with NULL budget: {df_movies['budget'].isna().sum()}")
-    print(f"Total genre rows: {len(df_movie_genres)}")
-    print(f"Unique genres: {df_movie_genres['genre'].nunique()}")
-    print("Transformation complete!")
+    if verbose:
+        print(f"Movies after cleaning: {len(df_movies)}")
+        print(f"Rows dropped without a title: {missing_titles}")
+        print(f"Rows with NULL box_office: {df_movies['box_office'].isna().sum()}")
+        print(f"Rows with NULL budget: {df_movies['budget'].isna().sum()}")
+        print(f"Genre rows before dedup (duplicates are dropped on load): {len(df_movie_genres)}")
+        print(f"Unique genres: {df_movie_genres['genre'].nunique()}")
+        print("Transformation complete!")
 
     return df_movies, df_movie_genres
 
 
 if __name__ == "__main__":
     # Quick local test using the CSV file directly (bypasses S3)
-    df_raw = pd.read_csv('data/movies.csv')
+    df_raw = pd.read_csv('data/movies.csv', dtype_backend='pyarrow')
     df_movies, df_movie_genres = transform(df_raw)
 
     print("\n--- First 5 movies ---")
@@ -1,13 +1,13 @@
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
+from sqlalchemy import text
+import sys
 import os
 
-load_dotenv()
+# Add project root to Python path so we can reuse the shared engine
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-engine = create_engine(
-    f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
-    f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-)
+from etl.load_postgres import get_engine
+
+engine = get_engine()
 
 with engine.connect() as conn:
     result = conn.execute(text("SELECT version();"))
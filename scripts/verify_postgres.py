@@ -1,21 +1,22 @@
-from sqlalchemy import create_engine, text
-from dotenv import load_dotenv
+from sqlalchemy import text
+import sys
 import os
 
-load_dotenv()
+# Add project root to Python path so we can reuse the shared engine
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-engine = create_engine(
-    f"postgresql://{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}"
-    f"@{os.getenv('DB_HOST')}:{os.getenv('DB_PORT')}/{os.getenv('DB_NAME')}"
-)
+from etl.load_postgres import get_engine
 
-with engine.connect() as conn:
+engine = get_engine()
+
+# All checks run in a single transaction
+with engine.begin() as conn:
 
     print("--- Top 5 filmova po ROI ---")
     result = conn.execute(text("""
         SELECT title, release_year, budget, box_office, roi
         FROM movies
-        ORDER BY roi DESC
+        ORDER BY roi DESC NULLS LAST
         LIMIT 5;
     """))
     for row in result:
@@ -33,12 +34,10 @@ with engine.connect() as conn:
         print(row)
 
     print("\n--- Ukupan broj redova ---")
-    movies_count = conn.execute(
-        text("SELECT COUNT(*) FROM movies")
-    ).scalar()
-    genres_count = conn.execute(
-        text("SELECT COUNT(*) FROM movie_genres")
-    ).scalar()
+    movies_count, genres_count = conn.execute(text("""
+        SELECT (SELECT COUNT(*) FROM movies),
+               (SELECT COUNT(*) FROM movie_genres);
+    """)).one()
     print(f"movies: {movies_count} redova")
     print(f"movie_genres: {genres_count} redova")
     